@@ -0,0 +1,98 @@
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from fastapi.staticfiles import StaticFiles
+from starlette.staticfiles import NotModifiedResponse
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+
+# Versioned URLs (?v=<content hash>) never change content, so cache them for a year
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+# Precompressed variants written by scripts/compress_static.py, in order of preference
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+_hashes: dict[str, tuple[tuple[int, int], str]] = {}
+
+
+def _content_hash(full_path, st: os.stat_result) -> str:
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _hashes.get(str(full_path))
+    if cached is None or cached[0] != key:
+        digest = hashlib.sha256(Path(full_path).read_bytes()).hexdigest()[:12]
+        cached = _hashes[str(full_path)] = (key, digest)
+    return cached[1]
+
+
+def static_url(path: str) -> str:
+    """Return the /static URL for path with a content hash as cache buster."""
+    full_path = STATIC_DIR / path
+    try:
+        st = full_path.stat()
+    except OSError:
+        return f"/static/{path}"
+    return f"/static/{path}?v={_content_hash(full_path, st)}"
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with long-lived caching and precompressed variants.
+
+    Requests whose ?v= matches the current content hash get an immutable
+    Cache-Control, everything else (including old or made-up versions) has
+    to revalidate (ETag/Last-Modified -> 304). If a .br/.gz file sits
+    next to the requested one and the client accepts that encoding it is sent
+    instead. Range requests always get the original file.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        query = parse_qs(scope.get("query_string", b"").decode())
+        versioned = query.get("v", [""])[0] == _content_hash(full_path, stat_result)
+        headers = {"Cache-Control": IMMUTABLE_CACHE if versioned else "no-cache"}
+
+        variants = []
+        for encoding, suffix in PRECOMPRESSED:
+            try:
+                variant_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            # Skip variants left over from before the original was edited
+            if variant_stat.st_mtime >= stat_result.st_mtime:
+                variants.append((encoding, f"{full_path}{suffix}", variant_stat))
+        if variants:
+            headers["Vary"] = "Accept-Encoding"
+        accepted = {
+            token.split(";")[0].strip()
+            for token in request_headers.get("accept-encoding", "").split(",")
+        }
+
+        response = None
+        if "range" not in request_headers:
+            for encoding, path, variant_stat in variants:
+                if encoding in accepted:
+                    response = FileResponse(
+                        path,
+                        status_code=status_code,
+                        stat_result=variant_stat,
+                        media_type=mimetypes.guess_type(str(full_path))[0],
+                        headers={**headers, "Content-Encoding": encoding},
+                    )
+                    break
+        if response is None:
+            response = FileResponse(
+                full_path, status_code=status_code, stat_result=stat_result, headers=headers
+            )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
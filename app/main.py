@@ -6,10 +6,10 @@ import urllib.request
 from pathlib import Path
 from fastapi import FastAPI, Request, Depends, Form, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session as DBSession
 
+from .assets import STATIC_DIR, CachedStaticFiles, static_url
 from .db import get_db, engine, Base
 from .models import Task, Attendee, Setting
 from .ws import manager
@@ -20,8 +20,9 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI()
 
 BASE_DIR = Path(__file__).resolve().parent
-app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
 templates = Jinja2Templates(directory=BASE_DIR / "templates")
+templates.env.globals["static_url"] = static_url
 
 # In production behind Caddy: "/stream"
 # For local dev: "http://localhost:8081"
@@ -82,6 +83,62 @@ def _set_setting(db: DBSession, key: str, value: str) -> None:
     db.commit()
 
 
+def _wants_json(request: Request) -> bool:
+    return "application/json" in request.headers.get("accept", "")
+
+
+def _admin_response(request: Request, **changed):
+    """Reply to an admin action.
+
+    Browsers without JS get the usual redirect back to /admin. The admin page
+    script asks for JSON and gets only the state that changed, so it can
+    update in place without a second round-trip and a full re-render.
+    """
+    if _wants_json(request):
+        return JSONResponse(changed)
+    return RedirectResponse("/admin", status_code=303)
+
+
+def _task_flow_state() -> dict:
+    return {
+        "current_task": kisscam_state["current_task"],
+        "drawn": kisscam_state["drawn"],
+        "task_running": kisscam_state["task_running"],
+    }
+
+
+def _unused_count(db: DBSession) -> int:
+    return db.query(Task).filter(Task.status == "open").count()
+
+
+def _admin_state(db: DBSession) -> dict:
+    enabled = _get_setting(
+        db, "recording_enabled", "1" if DEFAULT_RECORDING_ENABLED else "0"
+    ) == "1"
+    cooldown_rounds = int(
+        _get_setting(db, "cooldown_rounds", str(DEFAULT_COOLDOWN_ROUNDS))
+    )
+    kisscam_state["recording_enabled"] = enabled
+    return {
+        "active": kisscam_state["active"],
+        **_task_flow_state(),
+        "recording_enabled": enabled,
+        "cooldown_rounds": cooldown_rounds,
+        "unused_count": _unused_count(db),
+        "attendee_count": db.query(Attendee).count(),
+    }
+
+
+def _attendees_changed(db: DBSession) -> dict:
+    attendees = db.query(Attendee).order_by(Attendee.name).all()
+    return {
+        "attendee_count": len(attendees),
+        "attendees_html": templates.get_template("admin_attendees.html").render(
+            attendees=attendees
+        ),
+    }
+
+
 @app.on_event("startup")
 def _load_settings():
     db = next(get_db())
@@ -122,78 +179,89 @@ async def kisscam_get_state():
 @app.get("/admin", response_class=HTMLResponse)
 async def admin_page(request: Request, db: DBSession = Depends(get_db)):
     attendees = db.query(Attendee).order_by(Attendee.name).all()
-    unused_count = db.query(Task).filter(Task.status == "open").count()
-    enabled = _get_setting(
-        db, "recording_enabled", "1" if DEFAULT_RECORDING_ENABLED else "0"
-    ) == "1"
-    cooldown_rounds = int(
-        _get_setting(db, "cooldown_rounds", str(DEFAULT_COOLDOWN_ROUNDS))
-    )
-    kisscam_state["recording_enabled"] = enabled
     return templates.TemplateResponse(
         "admin.html",
         {
             "request": request,
-            "active": kisscam_state["active"],
-            "current_task": kisscam_state["current_task"],
-            "drawn": kisscam_state["drawn"],
-            "task_running": kisscam_state["task_running"],
-            "recording_enabled": enabled,
-            "cooldown_rounds": cooldown_rounds,
-            "unused_count": unused_count,
+            "state": _admin_state(db),
             "attendees": attendees,
         },
     )
 
 
+@app.get("/admin/state")
+async def admin_get_state(request: Request, db: DBSession = Depends(get_db)):
+    state = _admin_state(db)
+    if request.query_params.get("attendees"):
+        state.update(_attendees_changed(db))
+    return JSONResponse(state)
+
+
 @app.post("/admin/toggle")
-async def admin_toggle():
+async def admin_toggle(request: Request):
     kisscam_state["active"] = not kisscam_state["active"]
     await manager.broadcast_kisscam_state(kisscam_state["active"])
-    return RedirectResponse("/admin", status_code=303)
+    return _admin_response(request, active=kisscam_state["active"])
 
 
 @app.post("/admin/toggle-recording")
-async def admin_toggle_recording(db: DBSession = Depends(get_db)):
-    current = _get_setting(
-        db, "recording_enabled", "1" if DEFAULT_RECORDING_ENABLED else "0"
-    ) == "1"
-    new_value = "0" if current else "1"
+async def admin_toggle_recording(
+    request: Request,
+    enabled: str | None = Form(None),
+    db: DBSession = Depends(get_db),
+):
+    # The admin form sends the target value so a device showing stale state
+    # can't flip recording the wrong way; without it this is a plain toggle.
+    if enabled in ("0", "1"):
+        new_value = enabled
+    else:
+        current = _get_setting(
+            db, "recording_enabled", "1" if DEFAULT_RECORDING_ENABLED else "0"
+        ) == "1"
+        new_value = "0" if current else "1"
     _set_setting(db, "recording_enabled", new_value)
     kisscam_state["recording_enabled"] = new_value == "1"
-    return RedirectResponse("/admin", status_code=303)
+    await manager.broadcast_settings_updated(
+        recording_enabled=kisscam_state["recording_enabled"]
+    )
+    return _admin_response(request, recording_enabled=kisscam_state["recording_enabled"])
 
 
 @app.post("/admin/set-cooldown")
-async def admin_set_cooldown(rounds: int = Form(...), db: DBSession = Depends(get_db)):
+async def admin_set_cooldown(request: Request, rounds: int = Form(...), db: DBSession = Depends(get_db)):
     safe_rounds = max(0, min(rounds, 20))
     _set_setting(db, "cooldown_rounds", str(safe_rounds))
-    return RedirectResponse("/admin", status_code=303)
+    await manager.broadcast_settings_updated(cooldown_rounds=safe_rounds)
+    return _admin_response(request, cooldown_rounds=safe_rounds)
 
 
 @app.post("/admin/pick-task")
-async def pick_task(db: DBSession = Depends(get_db)):
+async def pick_task(request: Request, db: DBSession = Depends(get_db)):
     tasks = db.query(Task).filter(Task.status == "open").all()
     if tasks:
         task = random.choice(tasks)
         task.status = "used"
         db.commit()
         kisscam_state["current_task"] = task.text
-        await manager.broadcast_task_selected(task.text)
-    return RedirectResponse("/admin", status_code=303)
+        await manager.broadcast_task_selected(task.text, len(tasks) - 1)
+    return _admin_response(
+        request,
+        current_task=kisscam_state["current_task"],
+        unused_count=max(len(tasks) - 1, 0),
+    )
 
 
 @app.post("/admin/clear-task")
-async def clear_task():
+async def clear_task(request: Request):
     kisscam_state["current_task"] = None
     kisscam_state["drawn"] = None
     kisscam_state["task_running"] = False
     await manager.broadcast_stop_task()
-    return RedirectResponse("/admin", status_code=303)
+    return _admin_response(request, **_task_flow_state())
 
 
 @app.post("/admin/draw")
-async def draw_attendees(db: DBSession = Depends(get_db)):
+async def draw_attendees(request: Request, db: DBSession = Depends(get_db)):
     attendees = db.query(Attendee).all()
     if len(attendees) >= 2:
         all_names = [a.name for a in attendees]
@@ -214,11 +282,11 @@ async def draw_attendees(db: DBSession = Depends(get_db)):
             kisscam_state["draw_history"] = kisscam_state["draw_history"][-max(cooldown_rounds, 10):]
         kisscam_state["task_running"] = False
         await manager.broadcast_draw(all_names, sel_names)
-    return RedirectResponse("/admin", status_code=303)
+    return _admin_response(request, **_task_flow_state())
 
 
 @app.post("/admin/start-task")
-async def start_task():
+async def start_task(request: Request):
     if kisscam_state["current_task"] and kisscam_state["drawn"]:
         kisscam_state["task_running"] = True
         await manager.broadcast_start_task(
@@ -233,33 +301,42 @@ async def start_task():
                     kisscam_state["drawn"],
                 )
             )
-    return RedirectResponse("/admin", status_code=303)
+    return _admin_response(request, **_task_flow_state())
 
 
 @app.post("/admin/stop-task")
-async def stop_task():
+async def stop_task(request: Request):
     kisscam_state["task_running"] = False
     kisscam_state["drawn"] = None
     kisscam_state["current_task"] = None
     await manager.broadcast_stop_task()
     if kisscam_state["recording_enabled"]:
         asyncio.create_task(_async_recording_signal("stop"))
-    return RedirectResponse("/admin", status_code=303)
+    return _admin_response(request, **_task_flow_state())
 
 
 @app.post("/admin/attendees")
-async def add_attendee(name: str = Form(...), db: DBSession = Depends(get_db)):
+async def add_attendee(request: Request, name: str = Form(...), db: DBSession = Depends(get_db)):
     db.add(Attendee(name=name.strip()))
     db.commit()
+    changed = _attendees_changed(db)
+    await manager.broadcast_attendees_updated(**changed)
+    if _wants_json(request):
+        return JSONResponse(changed)
     return RedirectResponse("/admin", status_code=303)
 
 
 @app.post("/admin/attendees/{attendee_id}/delete")
-async def delete_attendee(attendee_id: int, db: DBSession = Depends(get_db)):
+async def delete_attendee(request: Request, attendee_id: int, db: DBSession = Depends(get_db)):
     attendee = db.query(Attendee).get(attendee_id)
+    changed = None
     if attendee:
         db.delete(attendee)
         db.commit()
+        changed = _attendees_changed(db)
+        await manager.broadcast_attendees_updated(**changed)
+    if _wants_json(request):
+        return JSONResponse(changed or _attendees_changed(db))
     return RedirectResponse("/admin", status_code=303)
 
 
@@ -280,7 +357,7 @@ async def tasks_add_page(request: Request):
 async def tasks_add_action(text: str = Form(...), db: DBSession = Depends(get_db)):
     db.add(Task(text=text.strip(), status="open"))
     db.commit()
-    await manager.broadcast_tasks_updated()
+    await manager.broadcast_tasks_updated(_unused_count(db))
     return RedirectResponse("/tasks/add?saved=1", status_code=303)
 
 
@@ -299,7 +376,7 @@ async def delete_task(task_id: int, db: DBSession = Depends(get_db)):
     if task:
         db.delete(task)
         db.commit()
-        await manager.broadcast_tasks_updated()
+        await manager.broadcast_tasks_updated(_unused_count(db))
     return RedirectResponse("/tasks/manage", status_code=303)
 
 
@@ -309,7 +386,7 @@ async def reopen_task(task_id: int, db: DBSession = Depends(get_db)):
     if task:
         task.status = "open"
         db.commit()
-        await manager.broadcast_tasks_updated()
+        await manager.broadcast_tasks_updated(_unused_count(db))
     return RedirectResponse("/tasks/manage", status_code=303)
 
 
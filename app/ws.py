@@ -13,8 +13,28 @@ class ConnectionManager:
     def disconnect(self, ws: WebSocket):
         self.active.remove(ws)
 
-    async def broadcast_tasks_updated(self):
-        message = json.dumps({"type": "tasks_updated"})
+    async def broadcast_tasks_updated(self, unused_count: int):
+        message = json.dumps({"type": "tasks_updated", "unused_count": unused_count})
+        for ws in list(self.active):
+            try:
+                await ws.send_text(message)
+            except Exception:
+                self.active.remove(ws)
+
+    async def broadcast_attendees_updated(self, attendee_count: int, attendees_html: str):
+        message = json.dumps({
+            "type": "attendees_updated",
+            "attendee_count": attendee_count,
+            "attendees_html": attendees_html,
+        })
+        for ws in list(self.active):
+            try:
+                await ws.send_text(message)
+            except Exception:
+                self.active.remove(ws)
+
+    async def broadcast_settings_updated(self, **settings):
+        message = json.dumps({"type": "settings_updated", **settings})
         for ws in list(self.active):
             try:
                 await ws.send_text(message)
@@ -29,8 +49,8 @@ class ConnectionManager:
             except Exception:
                 self.active.remove(ws)
 
-    async def broadcast_task_selected(self, task_text):
-        message = json.dumps({"type": "task_selected", "text": task_text})
+    async def broadcast_task_selected(self, task_text, unused_count: int):
+        message = json.dumps({"type": "task_selected", "text": task_text, "unused_count": unused_count})
         for ws in list(self.active):
             try:
                 await ws.send_text(message)
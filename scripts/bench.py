@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""Hardware-free end-to-end benchmark.
+
+Starts the web app and the stream server (with the replay camera backend)
+on free local ports, connects N WebSocket clients and M stream viewers,
+drives the admin flow (pick-task, draw, start-task, stop-task) and prints
+a JSON report:
+
+  - broadcast latency percentiles (admin POST sent -> WS message received)
+  - admin action round-trip times
+  - delivered fps and frame age per stream viewer
+  - CPU and RSS of the web and stream processes
+
+Usage:
+  python scripts/bench.py --clients 20 --viewers 3 --rounds 10 -o bench.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+import websockets
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Admin action -> WebSocket message type it broadcasts
+FLOW = [
+    ("/admin/pick-task", "task_selected"),
+    ("/admin/draw", "draw_attendees"),
+    ("/admin/start-task", "start_task"),
+    ("/admin/stop-task", "stop_task"),
+]
+
+FRAME_TAG = re.compile(rb"seq=(\d+) t=([\d.]+)")
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, proc: subprocess.Popen, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"process exited early (rc={proc.returncode}): {proc.args}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"port {port} did not open within {timeout}s")
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(pick(50), 3),
+        "p90": round(pick(90), 3),
+        "p95": round(pick(95), 3),
+        "p99": round(pick(99), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Process metrics (Linux /proc)
+# ---------------------------------------------------------------------------
+
+def _cpu_seconds(pid: int) -> float | None:
+    """User + system time of pid, including children it has waited for
+    (e.g. finished ffmpeg recordings of the stream server)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return sum(int(field) for field in fields[11:15]) / CLK_TCK
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _rss_kb(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class ProcessSampler(threading.Thread):
+    """Samples RSS periodically and CPU time at start/stop of a process."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.rss: list[int] = []
+        self._done = threading.Event()
+        self._cpu_start = None
+        self._wall_start = None
+
+    def run(self):
+        self._cpu_start = _cpu_seconds(self.pid)
+        self._wall_start = time.monotonic()
+        while not self._done.is_set():
+            rss = _rss_kb(self.pid)
+            if rss is not None:
+                self.rss.append(rss)
+            self._done.wait(self.interval)
+
+    def stop(self) -> dict:
+        self._done.set()
+        self.join()
+        cpu_end = _cpu_seconds(self.pid)
+        wall = time.monotonic() - self._wall_start
+        result = {}
+        if self._cpu_start is not None and cpu_end is not None and wall > 0:
+            result["cpu_seconds"] = round(cpu_end - self._cpu_start, 3)
+            result["cpu_percent"] = round(100 * (cpu_end - self._cpu_start) / wall, 1)
+        if self.rss:
+            result["rss_kb_peak"] = max(self.rss)
+            result["rss_kb_mean"] = int(sum(self.rss) / len(self.rss))
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Stream viewers
+# ---------------------------------------------------------------------------
+
+class Viewer(threading.Thread):
+    """Long-polls the snapshot endpoint the same way kisscam.html does."""
+
+    def __init__(self, url: str, stop: threading.Event, delay: float):
+        super().__init__(daemon=True)
+        self.url = url
+        self.stop_event = stop
+        self.delay = delay
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.bytes = 0
+        self.frames: set[int] = set()
+        self.frame_age_ms: list[float] = []
+        self.started = None
+        self.elapsed = 0.0
+
+    def run(self):
+        self.started = time.monotonic()
+        etag = ""
+        while not self.stop_event.is_set():
+            try:
+                url = f"{self.url}?after={urllib.parse.quote(etag)}"
+                try:
+                    with urllib.request.urlopen(url, timeout=15) as resp:
+                        data = resp.read()
+                        etag = resp.headers.get("ETag", "")
+                except urllib.error.HTTPError as e:
+                    if e.code != 304:
+                        raise
+                    self.requests += 1
+                    self.not_modified += 1
+                    continue
+                received = time.time()
+                self.requests += 1
+                self.bytes += len(data)
+                match = FRAME_TAG.search(data[:256])
+                if match:
+                    seq = int(match.group(1))
+                    if seq not in self.frames:
+                        self.frames.add(seq)
+                        self.frame_age_ms.append((received - float(match.group(2))) * 1000)
+                self.stop_event.wait(self.delay)
+            except Exception:
+                self.errors += 1
+                self.stop_event.wait(1.0)
+        self.elapsed = time.monotonic() - self.started
+
+    def report(self) -> dict:
+        elapsed = self.elapsed or 1.0
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "distinct_frames": len(self.frames),
+            "delivered_fps": round(len(self.frames) / elapsed, 2),
+            "request_rate": round(self.requests / elapsed, 2),
+            "kbytes_per_s": round(self.bytes / 1024 / elapsed, 1),
+            "frame_age_ms": _percentiles(self.frame_age_ms),
+        }
+
+
+# ---------------------------------------------------------------------------
+# WebSocket clients + admin driver
+# ---------------------------------------------------------------------------
+
+class Inbox:
+    """Receive times of broadcast messages, grouped by message type."""
+
+    def __init__(self):
+        self.received: dict[str, list[float]] = {}
+        self.cond = asyncio.Condition()
+
+    async def add(self, msg_type: str, at: float):
+        async with self.cond:
+            self.received.setdefault(msg_type, []).append(at)
+            self.cond.notify_all()
+
+    def count(self, msg_type: str) -> int:
+        return len(self.received.get(msg_type, []))
+
+
+async def _ws_client(url: str, inbox: Inbox, ready: asyncio.Event, connected: list):
+    async with websockets.connect(url, max_queue=None) as ws:
+        connected.append(ws)
+        ready.set()
+        async for raw in ws:
+            at = time.perf_counter()
+            await inbox.add(json.loads(raw).get("type", ""), at)
+
+
+def _post(url: str, data: dict | None = None) -> float:
+    """POST like the admin page script does (JSON action API, no redirect)."""
+    body = urllib.parse.urlencode(data or {}).encode()
+    req = urllib.request.Request(url, data=body, headers={"Accept": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        resp.read()
+    return (time.perf_counter() - start) * 1000
+
+
+async def _drive(base_url: str, inbox: Inbox, clients: int, rounds: int,
+                 task_seconds: float, timeout: float) -> dict:
+    latencies: dict[str, list[float]] = {msg_type: [] for _, msg_type in FLOW}
+    action_ms: dict[str, list[float]] = {path: [] for path, _ in FLOW}
+    missed = 0
+    for _ in range(rounds):
+        for path, msg_type in FLOW:
+            before = inbox.count(msg_type)
+            sent = time.perf_counter()
+            action_ms[path].append(await asyncio.to_thread(_post, base_url + path))
+            try:
+                async with inbox.cond:
+                    await asyncio.wait_for(
+                        inbox.cond.wait_for(lambda: inbox.count(msg_type) >= before + clients),
+                        timeout,
+                    )
+            except asyncio.TimeoutError:
+                pass
+            arrivals = inbox.received.get(msg_type, [])[before:]
+            missed += clients - len(arrivals)
+            latencies[msg_type].extend((at - sent) * 1000 for at in arrivals)
+            if msg_type == "start_task":
+                await asyncio.sleep(task_seconds)
+    everything = [v for values in latencies.values() for v in values]
+    return {
+        "broadcast_latency_ms": {
+            "all": _percentiles(everything),
+            **{msg_type: _percentiles(values) for msg_type, values in latencies.items()},
+        },
+        "admin_action_ms": {path: _percentiles(values) for path, values in action_ms.items()},
+        "missed_messages": missed,
+    }
+
+
+async def _run_clients(args, base_url: str, ws_url: str) -> dict:
+    inbox = Inbox()
+    connected: list = []
+    tasks = []
+    for _ in range(args.clients):
+        ready = asyncio.Event()
+        tasks.append(asyncio.create_task(_ws_client(ws_url, inbox, ready, connected)))
+        await asyncio.wait_for(ready.wait(), 10)
+    try:
+        return await _drive(base_url, inbox, args.clients, args.rounds,
+                            args.task_seconds, args.timeout)
+    finally:
+        for ws in connected:
+            await ws.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(args) -> dict:
+    web_port = args.web_port or _free_port()
+    stream_port = args.stream_port or _free_port()
+    workdir = Path(tempfile.mkdtemp(prefix="pi-webapp-bench-"))
+
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{workdir / 'bench.db'}",
+        "STREAM_URL": f"http://127.0.0.1:{stream_port}",
+        "STREAM_INTERNAL_URL": f"http://127.0.0.1:{stream_port}",
+        "STREAM_PORT": str(stream_port),
+        "CAMERA_SOURCE": "replay",
+        "REPLAY_FILE": args.replay_file or "",
+        "REPLAY_FPS": str(args.fps),
+        "RECORDINGS_DIR": str(workdir / "recordings"),
+    })
+    log = open(workdir / "servers.log", "wb")
+    stream = subprocess.Popen(
+        [sys.executable, "-u", str(ROOT / "scripts" / "webcam_stream.py")],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    web = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(web_port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        _wait_for_port(stream_port, stream)
+        _wait_for_port(web_port, web)
+        base_url = f"http://127.0.0.1:{web_port}"
+
+        for i in range(args.rounds):
+            _post(f"{base_url}/tasks/add", {"text": f"Bench task {i + 1}"})
+        for i in range(max(args.attendees, 2)):
+            _post(f"{base_url}/admin/attendees", {"name": f"Guest {i + 1:02d}"})
+        # Recording spawns an ffmpeg encoder per task if ffmpeg is installed,
+        # which makes CPU figures incomparable between hosts; off unless asked
+        with urllib.request.urlopen(f"{base_url}/admin/state", timeout=10) as resp:
+            recording_enabled = json.load(resp)["recording_enabled"]
+        if recording_enabled != args.recording:
+            _post(f"{base_url}/admin/toggle-recording")
+
+        samplers = {"web": ProcessSampler(web.pid), "stream": ProcessSampler(stream.pid)}
+        for sampler in samplers.values():
+            sampler.start()
+        stop = threading.Event()
+        viewers = [
+            Viewer(f"http://127.0.0.1:{stream_port}/", stop, args.viewer_delay)
+            for _ in range(args.viewers)
+        ]
+        for viewer in viewers:
+            viewer.start()
+
+        started = time.monotonic()
+        results = asyncio.run(_run_clients(args, base_url, f"ws://127.0.0.1:{web_port}/ws"))
+        duration = time.monotonic() - started
+
+        stop.set()
+        for viewer in viewers:
+            viewer.join()
+        processes = {name: sampler.stop() for name, sampler in samplers.items()}
+    finally:
+        for proc in (web, stream):
+            proc.terminate()
+        for proc in (web, stream):
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        log.close()
+
+    viewer_reports = [viewer.report() for viewer in viewers]
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {
+                "clients": args.clients,
+                "viewers": args.viewers,
+                "rounds": args.rounds,
+                "attendees": args.attendees,
+                "fps": args.fps,
+                "replay_file": args.replay_file,
+                "task_seconds": args.task_seconds,
+                "viewer_delay": args.viewer_delay,
+                "recording": args.recording,
+            },
+            "duration_s": round(duration, 2),
+            "log": str(workdir / "servers.log"),
+        },
+        **results,
+        "viewers": {
+            "delivered_fps": _percentiles([v["delivered_fps"] for v in viewer_reports]),
+            "per_viewer": viewer_reports,
+        },
+        "processes": processes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=10, help="WebSocket clients")
+    parser.add_argument("--viewers", type=int, default=2, help="stream viewers")
+    parser.add_argument("--rounds", type=int, default=5, help="admin flow rounds")
+    parser.add_argument("--attendees", type=int, default=12)
+    parser.add_argument("--fps", type=float, default=15, help="replay camera fps")
+    parser.add_argument("--replay-file", help="MJPEG file to replay (default: synthetic frames)")
+    parser.add_argument("--task-seconds", type=float, default=2.0,
+                        help="how long each task runs before stop-task")
+    parser.add_argument("--recording", action="store_true",
+                        help="keep task recording on (needs ffmpeg; its CPU counts towards the stream process)")
+    parser.add_argument("--viewer-delay", type=float, default=0.0,
+                        help="pause between snapshot fetches (kisscam.html long-polls without pause)")
+    parser.add_argument("--timeout", type=float, default=5.0,
+                        help="max wait for a broadcast to reach all clients")
+    parser.add_argument("--web-port", type=int, default=0)
+    parser.add_argument("--stream-port", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
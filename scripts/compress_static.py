@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Write precompressed .gz (and .br, if brotli is installed) copies of text
+assets in app/static so they can be served without compressing per request.
+Run at build time; media files are left alone.
+"""
+import gzip
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "app" / "static"
+TEXT_SUFFIXES = {".css", ".js", ".html", ".svg", ".json", ".txt", ".map"}
+
+
+def compress(path: Path) -> list[Path]:
+    data = path.read_bytes()
+    written = []
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        # Not worth serving if it doesn't save anything
+        if len(compressed) >= len(data):
+            continue
+        target = path.with_name(path.name + suffix)
+        target.write_bytes(compressed)
+        written.append(target)
+    return written
+
+
+if __name__ == "__main__":
+    if brotli is None:
+        print("brotli not installed, writing gzip variants only")
+    for path in sorted(STATIC_DIR.rglob("*")):
+        if path.is_file() and path.suffix in TEXT_SUFFIXES:
+            for target in compress(path):
+                print(f"{target.relative_to(STATIC_DIR)} ({target.stat().st_size} bytes)")
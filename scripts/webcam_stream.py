@@ -4,23 +4,50 @@
 Auto-detects camera source:
   1. gphoto2 (Sony/Nikon via USB in PC Remote mode)
   2. ffmpeg + V4L2 webcam (/dev/video0)
+
+Set CAMERA_SOURCE=replay to run without hardware: frames are replayed from
+the MJPEG file in REPLAY_FILE (or generated synthetically) at REPLAY_FPS.
+
+Snapshots carry a per-frame ETag. Clients can revalidate with If-None-Match
+(304 if the frame is unchanged) or long-poll with ?after=<etag>, which
+blocks until a newer frame exists (or LONG_POLL_TIMEOUT passes -> 304).
 """
+import base64
 import datetime
 import os
 import subprocess
 import shutil
 import threading
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
-PORT = 8081
+PORT = int(os.environ.get("STREAM_PORT", "8081"))
 DEVICE = "/dev/video0"
 RECORDINGS_DIR = os.environ.get("RECORDINGS_DIR", "/recordings")
 RECORD_FPS = int(os.environ.get("RECORD_FPS", "15"))
+LONG_POLL_TIMEOUT = float(os.environ.get("LONG_POLL_TIMEOUT", "10"))
+
+# auto | gphoto2 | ffmpeg | replay
+CAMERA_SOURCE = os.environ.get("CAMERA_SOURCE", "auto")
+REPLAY_FILE = os.environ.get("REPLAY_FILE", "")
+REPLAY_FPS = float(os.environ.get("REPLAY_FPS", "15"))
+# Synthetic frames are padded to roughly the size of a 640x480 webcam frame
+REPLAY_FRAME_SIZE = int(os.environ.get("REPLAY_FRAME_SIZE", "40000"))
+
+# 16x16 grey baseline JPEG used as the body of synthetic replay frames
+SYNTHETIC_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDABALDA4MChAODQ4SERATGCgaGBYWGDEjJR0oOjM9"
+    "PDkzODdASFxOQERXRTc4UG1RV19iZ2hnPk1xeXBkeFxlZ2P/wAALCAAQABABAREA/8QAFQAB"
+    "AQAAAAAAAAAAAAAAAAAAAAX/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/9oACAEBAAA/AJ4D/9k="
+)
 
 lock = threading.Lock()
+frame_ready = threading.Condition(lock)
 frame_bytes = b""
+frame_id = 0
+# Part of every ETag so ids from before a restart never match
+BOOT_ID = f"{int(time.time()):x}"
 
 recording_lock = threading.Lock()
 recording_active = False
@@ -41,14 +68,14 @@ def _sanitize_label(value: str) -> str:
     return result or "unknown"
 
 
-def _record_loop():
-    global recording_active, recording_proc
+def _record_loop(proc: subprocess.Popen):
+    # Only ever touches its own proc: the globals may already belong to a
+    # newer recording started while this one was being stopped
     interval = 1.0 / max(RECORD_FPS, 1)
     while True:
         with recording_lock:
-            active = recording_active
-            proc = recording_proc
-        if not active or proc is None or proc.poll() is not None:
+            current = recording_active and recording_proc is proc
+        if not current or proc.poll() is not None:
             break
         with lock:
             data = frame_bytes
@@ -60,8 +87,8 @@ def _record_loop():
                 break
         time.sleep(interval)
     try:
-        if recording_proc and recording_proc.stdin:
-            recording_proc.stdin.close()
+        if proc.stdin:
+            proc.stdin.close()
     except Exception:
         pass
 
@@ -104,7 +131,9 @@ def start_recording(task: str, names: str) -> tuple[bool, str | None]:
             recording_active = False
             return False, None
         recording_active = True
-        recording_thread = threading.Thread(target=_record_loop, daemon=True)
+        recording_thread = threading.Thread(
+            target=_record_loop, args=(recording_proc,), daemon=True
+        )
         recording_thread.start()
         return True, recording_path
 
@@ -126,8 +155,11 @@ def stop_recording() -> str | None:
                 proc.kill()
             except Exception:
                 pass
-    recording_proc = None
-    recording_thread = None
+    with recording_lock:
+        # A new recording may have started while we were waiting for this one
+        if recording_proc is proc:
+            recording_proc = None
+            recording_thread = None
     return path
 
 
@@ -147,7 +179,6 @@ def detect_gphoto2_camera():
 
 
 def capture_loop_gphoto2():
-    global frame_bytes
     print("Using gphoto2 capture...", flush=True)
     while True:
         try:
@@ -156,8 +187,7 @@ def capture_loop_gphoto2():
                 capture_output=True, timeout=10,
             )
             if result.returncode == 0 and len(result.stdout) > 100:
-                with lock:
-                    frame_bytes = result.stdout
+                _publish_frame(result.stdout)
             else:
                 time.sleep(0.5)
         except subprocess.TimeoutExpired:
@@ -167,29 +197,25 @@ def capture_loop_gphoto2():
             time.sleep(1)
 
 
-def capture_loop_ffmpeg():
-    global frame_bytes
-    cmd = [
-        "ffmpeg",
-        "-f", "v4l2",
-        "-input_format", "mjpeg",
-        "-video_size", "640x480",
-        "-framerate", "15",
-        "-i", DEVICE,
-        "-c:v", "copy",
-        "-f", "mjpeg",
-        "pipe:1",
-    ]
-    print(f"Using ffmpeg webcam: {' '.join(cmd)}", flush=True)
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+def _publish_frame(data: bytes):
+    global frame_bytes, frame_id
+    with frame_ready:
+        frame_bytes = data
+        frame_id += 1
+        frame_ready.notify_all()
+
+
+def _frame_etag(fid: int) -> str:
+    return f'"{BOOT_ID}-{fid}"'
 
+
+def _iter_mjpeg_frames(stream):
+    """Yield complete JPEG frames (SOI..EOI) from a concatenated MJPEG stream."""
     buf = b""
     while True:
-        chunk = proc.stdout.read(4096)
+        chunk = stream.read(4096)
         if not chunk:
-            stderr = proc.stderr.read().decode(errors="replace")
-            print(f"ffmpeg exited (rc={proc.wait()}). stderr:\n{stderr}", flush=True)
-            break
+            return
         buf += chunk
         while True:
             soi = buf.find(b"\xff\xd8")
@@ -202,8 +228,76 @@ def capture_loop_ffmpeg():
                 break
             frame = buf[soi:eoi + 2]
             buf = buf[eoi + 2:]
-            with lock:
-                frame_bytes = frame
+            yield frame
+
+
+def _tag_frame(frame: bytes, seq: int, pad_to: int = 0) -> bytes:
+    """Insert a JPEG comment with sequence number and capture time after SOI.
+
+    The benchmark reads this back to count distinct frames and measure frame
+    age. Optional padding (more COM segments) lets synthetic frames match the
+    size of real camera frames.
+    """
+    text = f"pi-webapp replay seq={seq} t={time.time():.6f}".encode()
+    segments = [b"\xff\xfe" + (len(text) + 2).to_bytes(2, "big") + text]
+    missing = pad_to - len(frame) - len(segments[0])
+    while missing > 4:
+        size = min(missing - 4, 65533)
+        segments.append(b"\xff\xfe" + (size + 2).to_bytes(2, "big") + b" " * size)
+        missing -= size + 4
+    return frame[:2] + b"".join(segments) + frame[2:]
+
+
+def capture_loop_replay():
+    frames = []
+    if REPLAY_FILE:
+        try:
+            with open(REPLAY_FILE, "rb") as f:
+                frames = list(_iter_mjpeg_frames(f))
+        except OSError as e:
+            print(f"replay file error: {e}", flush=True)
+    if frames:
+        print(f"Using replay file {REPLAY_FILE} ({len(frames)} frames) at {REPLAY_FPS:g} fps", flush=True)
+    else:
+        print(f"Using synthetic replay frames at {REPLAY_FPS:g} fps", flush=True)
+    interval = 1.0 / max(REPLAY_FPS, 0.1)
+    seq = 0
+    next_at = time.monotonic()
+    while True:
+        if frames:
+            frame = _tag_frame(frames[seq % len(frames)], seq)
+        else:
+            frame = _tag_frame(SYNTHETIC_JPEG, seq, REPLAY_FRAME_SIZE)
+        _publish_frame(frame)
+        seq += 1
+        next_at += interval
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Fell behind; don't try to catch up with a burst of frames
+            next_at = time.monotonic()
+
+
+def capture_loop_ffmpeg():
+    cmd = [
+        "ffmpeg",
+        "-f", "v4l2",
+        "-input_format", "mjpeg",
+        "-video_size", "640x480",
+        "-framerate", "15",
+        "-i", DEVICE,
+        "-c:v", "copy",
+        "-f", "mjpeg",
+        "pipe:1",
+    ]
+    print(f"Using ffmpeg webcam: {' '.join(cmd)}", flush=True)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    for frame in _iter_mjpeg_frames(proc.stdout):
+        _publish_frame(frame)
+    stderr = proc.stderr.read().decode(errors="replace")
+    print(f"ffmpeg exited (rc={proc.wait()}). stderr:\n{stderr}", flush=True)
 
 
 class StreamHandler(BaseHTTPRequestHandler):
@@ -226,32 +320,57 @@ class StreamHandler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write((path or "").encode())
             return
-        with lock:
+        after = parse_qs(parsed.query).get("after", [""])[0]
+        with frame_ready:
+            if after and after == _frame_etag(frame_id):
+                frame_ready.wait_for(lambda: _frame_etag(frame_id) != after, LONG_POLL_TIMEOUT)
             data = frame_bytes
+            etag = _frame_etag(frame_id)
         if not data:
             self.send_response(503)
             self.end_headers()
             return
+        # Weak comparison like Starlette's is_not_modified: W/ is ignored, * matches any frame
+        if_none_match = [
+            t.strip().removeprefix("W/")
+            for t in self.headers.get("If-None-Match", "").split(",")
+        ]
+        if etag == after or etag in if_none_match or "*" in if_none_match:
+            self.send_response(304)
+            self._send_frame_headers(etag)
+            self.end_headers()
+            return
         self.send_response(200)
         self.send_header("Content-Type", "image/jpeg")
         self.send_header("Content-Length", str(len(data)))
-        self.send_header("Cache-Control", "no-cache, no-store")
-        self.send_header("Access-Control-Allow-Origin", "*")
+        self._send_frame_headers(etag)
         self.end_headers()
         self.wfile.write(data)
 
+    def _send_frame_headers(self, etag: str):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+
     def log_message(self, format, *args):
         pass
 
 
 if __name__ == "__main__":
-    if detect_gphoto2_camera():
+    if CAMERA_SOURCE == "replay":
+        target = capture_loop_replay
+    elif CAMERA_SOURCE == "gphoto2":
+        target = capture_loop_gphoto2
+    elif CAMERA_SOURCE == "ffmpeg":
+        target = capture_loop_ffmpeg
+    elif detect_gphoto2_camera():
         target = capture_loop_gphoto2
     else:
         target = capture_loop_ffmpeg
 
     thread = threading.Thread(target=target, daemon=True)
     thread.start()
-    server = HTTPServer(("0.0.0.0", PORT), StreamHandler)
+    server = ThreadingHTTPServer(("0.0.0.0", PORT), StreamHandler)
     print(f"Stream server listening on http://0.0.0.0:{PORT}", flush=True)
     server.serve_forever()